@@ -26,4 +26,8 @@ setup(
     package_dir={"": "src"},
     packages=find_packages(where="src"),
     include_package_data=True,
+    extras_require={
+        "csr": ["numpy"],
+        "test": ["numpy"],
+    },
 )
\ No newline at end of file
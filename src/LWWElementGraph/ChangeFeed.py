@@ -0,0 +1,114 @@
+from collections import namedtuple, OrderedDict
+from .LWWElementSet import hashObj
+
+VertexAdded = namedtuple('VertexAdded', ['vertex'])
+VertexRemoved = namedtuple('VertexRemoved', ['vertex'])
+EdgeAdded = namedtuple('EdgeAdded', ['vertex1', 'vertex2', 'weight'])
+EdgeRemoved = namedtuple('EdgeRemoved', ['vertex1', 'vertex2'])
+
+def eventKey(event):
+    ''' Events with the same key describe the same vertex or edge, so only the latest
+        one matters to a consumer that has fallen behind. Undirected graphs publish edges
+        in a canonical direction, so the add and remove of one edge share a key '''
+    if isinstance(event, (VertexAdded, VertexRemoved)):
+        return ('vertex', hashObj(event.vertex))
+    return ('edge', hashObj((event.vertex1, event.vertex2)))
+
+class ChangeFeed(object):
+
+    def __init__(self):
+        ''' callbacks are called synchronously on every write. subscriptions buffer events
+            for async consumers, so a slow consumer never blocks the writer '''
+        self.callbacks = []
+        self.subscriptions = []
+
+    def __len__(self):
+        return len(self.callbacks) + len(self.subscriptions)
+
+    def subscribe(self, callback):
+        ''' callback(event) is called synchronously after every mutation, so it should be cheap.
+            Slow consumers should use stream instead. Returns callback for unsubscribe '''
+        self.callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        ''' Raises KeyError if callback is not subscribed '''
+        if callback not in self.callbacks:
+            raise KeyError("Callback {} not subscribed to ChangeFeed".format(callback))
+        self.callbacks.remove(callback)
+
+    def stream(self, maxsize):
+        ''' Async iterator of events, buffering at most maxsize of them '''
+        subscription = Subscription(self, maxsize)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def publish(self, event):
+        ''' Runs in O(1) per callback and subscription. The write has already happened, so a
+            callback that raises is logged and skipped, it never reaches the writer or stops
+            delivery to the other callbacks and subscriptions '''
+        if self.subscriptions:
+            key = eventKey(event)
+            for subscription in self.subscriptions:
+                subscription.push(key, event)
+        for callback in list(self.callbacks):
+            try:
+                callback(event)
+            except Exception:
+                import logging  # Only paid once a callback fails, tests/testStartup.py checks it
+                logging.getLogger(__name__).exception("ChangeFeed callback %r failed on %r", callback, event)
+
+class Subscription(object):
+
+    def __init__(self, feed, maxsize):
+        ''' pending is ordered oldest first and holds one event per key. dropped counts the
+            events lost to overflow, a consumer seeing it grow should resync from the graph '''
+        self.feed = feed
+        self.maxsize = maxsize
+        self.pending = OrderedDict()
+        self.dropped = 0
+        self.closed = False
+        self.loop = None
+        self.waiter = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        import asyncio  # Costs more than the rest of the package, so only paid by async consumers
+        while not self.pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self.loop = asyncio.get_event_loop()
+            self.waiter = self.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.pending.popitem(last=False)[1]
+
+    def push(self, key, event):
+        ''' Coalesce with a pending event for the same key, moving it to the back. If the
+            buffer is full of other keys, drop the oldest. Runs in O(1) '''
+        if key in self.pending:
+            del self.pending[key]
+        elif len(self.pending) >= self.maxsize:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[key] = event
+        self._wake()
+
+    def close(self):
+        ''' Stop receiving events. Pending events are still delivered before StopAsyncIteration '''
+        if not self.closed:
+            self.closed = True
+            self.feed.subscriptions.remove(self)
+            self._wake()
+
+    def _wake(self):
+        if self.waiter is not None:
+            self.loop.call_soon_threadsafe(self._resolve, self.waiter)
+
+    def _resolve(self, waiter):
+        if not waiter.done():
+            waiter.set_result(None)
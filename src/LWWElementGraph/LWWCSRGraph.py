@@ -0,0 +1,214 @@
+from collections import defaultdict
+import numpy as np
+from .LWWElementSet import hashObj
+from .LWWElementGraph import LWWElementGraph
+from .ChangeFeed import VertexAdded
+
+class CSRAdjacency(object):
+
+    def __init__(self, vertices, edges):
+        ''' Compressed sparse row adjacency. Vertices get integer ids in ids (hashObj -> id) and
+            objs (id -> vertex). Neighbours of id i are neighbors[offsets[i]:offsets[i + 1]].
+            Writes after the build go to a small delta layer (added, removed, dead) on top of
+            the arrays, writes counts them. A self-loop is stored as a single element set and
+            becomes a single arc. Runs in O(V + E log E) '''
+        self.ids, self.objs = {}, []
+        for v in vertices:
+            self.ids[hashObj(v)] = len(self.objs)
+            self.objs.append(v)
+        self.size = len(self.objs)
+        src, dst = [], []
+        for edge in edges:
+            ends = [self.ids[hashObj(v)] for v in edge]
+            i, j = ends if len(ends) == 2 else ends * 2
+            src.append(i), dst.append(j)
+            if i != j:
+                src.append(j), dst.append(i)
+        src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+        idType = np.int32 if self.size < 2**31 else np.int64
+        self.neighbors = dst[np.argsort(src, kind='stable')].astype(idType)
+        self.offsets = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.size), out=self.offsets[1:])
+        self.added, self.removed, self.dead = defaultdict(list), defaultdict(set), set()
+        self.writes = 0
+        self.deltaArrays = None
+
+    def __repr__(self):
+        return "CSRAdjacency: {} vertices, {} arcs, {} writes in delta".format(len(self), len(self.neighbors), self.writes)
+
+    def __len__(self):
+        return len(self.objs) - len(self.dead)
+
+    def __contains__(self, hashVertex):
+        return hashVertex in self.ids and self.ids[hashVertex] not in self.dead
+
+    def __getitem__(self, hashVertex):
+        ''' Neighbouring vertices, like graphState[hashObj(vertex)] of LWWElementGraph '''
+        return [self.objs[j] for j in self.neighborIds(self.ids[hashVertex])]
+
+    def neighborIds(self, i):
+        ''' Neighbour ids of the arrays, minus removed, plus added. Runs in O(deg(i)) '''
+        base = self.neighbors[self.offsets[i]:self.offsets[i + 1]].tolist() if i < self.size else []
+        if i in self.removed:
+            base = [j for j in base if j not in self.removed[i]]
+        return base + self.added[i] if i in self.added else base
+
+    def addVertex(self, vertex):
+        ''' New vertices get the next id, a re-added vertex keeps its old one '''
+        hashVertex = hashObj(vertex)
+        if hashVertex not in self.ids:
+            self.ids[hashVertex] = len(self.objs)
+            self.objs.append(vertex)
+        self.dead.discard(self.ids[hashVertex])
+        self.writes += 1
+
+    def removeVertex(self, vertex):
+        ''' Unlink the vertex from all its neighbours and mark its id dead. Runs in O(deg) '''
+        i = self.ids[hashObj(vertex)]
+        for j in self.neighborIds(i):
+            self._unlink(i, j)
+            self._unlink(j, i) if i != j else None
+        self.dead.add(i)
+        self.writes += 1
+
+    def addEdge(self, vertex1, vertex2):
+        i, j = self.ids[hashObj(vertex1)], self.ids[hashObj(vertex2)]
+        self._link(i, j)
+        self._link(j, i) if i != j else None
+        self.writes += 1
+
+    def removeEdge(self, vertex1, vertex2):
+        i, j = self.ids[hashObj(vertex1)], self.ids[hashObj(vertex2)]
+        self._unlink(i, j)
+        self._unlink(j, i) if i != j else None
+        self.writes += 1
+
+    def findPath(self, vertex1, vertex2):
+        ''' BFS for shortest path, level-synchronous over the arrays with the delta layer
+            applied, see _bfsArrays. Runs in O(V + E) '''
+        start, goal = self.ids[hashObj(vertex1)], self.ids[hashObj(vertex2)]
+        return [self.objs[i] for i in self._bfsArrays(start, goal)]
+
+    def _bfsArrays(self, start, goal):
+        ''' Expands a whole frontier per step. Slots of arcs in removed are dropped and arcs in
+            added are gathered from their own small CSR. Among the frontier, the first vertex to reach
+            a neighbour becomes its parent, same as a FIFO BFS over neighborIds '''
+        offsets, removedSlots, addedOffsets, addedNeighbors = self._deltaArrays()
+        parents = np.full(len(self.objs), -1, dtype=np.int64)
+        parents[start] = start
+        frontier = np.array([start], dtype=np.int64)
+        while frontier.size and parents[goal] < 0:
+            slots, position = self._gather(offsets, frontier)
+            ngbrs = self.neighbors[slots]
+            if removedSlots is not None:
+                live = ~np.isin(slots, removedSlots)
+                ngbrs, position = ngbrs[live], position[live]
+                addedSlots, addedPosition = self._gather(addedOffsets, frontier)
+                ngbrs = np.concatenate([ngbrs, addedNeighbors[addedSlots]])
+                position = np.concatenate([position, addedPosition])
+                order = np.argsort(position, kind='stable')
+                ngbrs, position = ngbrs[order], position[order]
+            fresh = parents[ngbrs] < 0
+            ngbrs, first = np.unique(ngbrs[fresh], return_index=True)
+            order = np.argsort(first)
+            parents[ngbrs[order]] = frontier[position[fresh][first[order]]]
+            frontier = ngbrs[order].astype(np.int64)
+        return self._walkBack(parents, start, goal) if parents[goal] >= 0 else []
+
+    def _gather(self, offsets, frontier):
+        ''' Neighbour slots of every frontier vertex in one step, and the frontier position
+            each slot came from '''
+        starts, counts = offsets[frontier], offsets[frontier + 1] - offsets[frontier]
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return slots, np.repeat(np.arange(frontier.size), counts)
+
+    def _deltaArrays(self):
+        ''' (offsets, removedSlots, addedOffsets, addedNeighbors) for _bfsArrays. Without writes,
+            the build arrays as they are. Otherwise offsets padded for new vertices, the slots in
+            neighbors of the removed arcs, found by scanning only the rows in removed, and a CSR
+            of the added arcs, cached until the next write. Runs in O(V + delta), delta being the
+            added arcs plus the degree of every vertex with a removed arc '''
+        if self.writes == 0:
+            return self.offsets, None, None, None
+        if self.deltaArrays is None or self.deltaArrays[0] != self.writes:
+            n = len(self.objs)
+            offsets = np.concatenate([self.offsets, np.full(n - self.size, self.offsets[-1], dtype=np.int64)])
+            removedSlots = [np.zeros(0, dtype=np.int64)]
+            for i, removed in self.removed.items():
+                if i < self.size and removed:
+                    row = self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+                    removedSlots.append(self.offsets[i] + np.flatnonzero(np.isin(row, list(removed))))
+            removedSlots = np.concatenate(removedSlots)
+            arcs = np.array([(i, j) for i, js in self.added.items() for j in js], dtype=np.int64).reshape(-1, 2)
+            addedNeighbors = arcs[np.argsort(arcs[:, 0], kind='stable'), 1]
+            addedOffsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(arcs[:, 0], minlength=n), out=addedOffsets[1:])
+            self.deltaArrays = (self.writes, (offsets, removedSlots, addedOffsets, addedNeighbors))
+        return self.deltaArrays[1]
+
+    def _walkBack(self, parents, start, goal):
+        ''' Ids from start to goal, following parents back from goal '''
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(parents[path[-1]]))
+        return path[::-1]
+
+    def _link(self, i, j):
+        if j in self.removed.get(i, ()):
+            self.removed[i].discard(j)
+        elif j not in self.neighborIds(i):
+            self.added[i].append(j)
+
+    def _unlink(self, i, j):
+        if j in self.added.get(i, ()):
+            self.added[i].remove(j)
+        else:
+            self.removed[i].add(j)
+
+class LWWCSRGraph(LWWElementGraph):
+
+    def __init__(self, compactEvery=1024):
+        ''' LWWElementGraph for read-mostly replicas, graphState is a CSRAdjacency. Writes go to
+            its delta layer, and every compactEvery writes the delta is folded by rebuilding
+            the arrays from vertices and edges '''
+        super().__init__()
+        self.compactEvery = compactEvery
+        self.graphState = self._computeGraph([], [])
+
+    def addVertex(self, vertex):
+        ''' Adds the Vertex to vertices LWWSet and to the delta layer. Runs in O(1) '''
+        self.vertices.addElement(vertex)
+        self.graphState.addVertex(vertex)
+        self.graphState = self._compacted(self.graphState)
+        self._publish(VertexAdded(vertex))
+
+    def findPath(self, vertex1, vertex2):
+        ''' Perform BFS for shortest path over the CSR arrays, see CSRAdjacency.findPath '''
+        if not self.vertices.isMember(vertex1):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex1))
+        elif not self.vertices.isMember(vertex2):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex2))
+        return self.graphState.findPath(vertex1, vertex2)
+
+    def _removeVertex(self, graphState, vertex):
+        graphState.removeVertex(vertex)
+        return self._compacted(graphState)
+
+    def _addEdge(self, graphState, vertex1, vertex2):
+        graphState.addEdge(vertex1, vertex2)
+        return self._compacted(graphState)
+
+    def _removeEdge(self, graphState, vertex1, vertex2):
+        graphState.removeEdge(vertex1, vertex2)
+        return self._compacted(graphState)
+
+    def _compacted(self, graphState):
+        ''' Fold the delta layer once it holds compactEvery writes. Amortized O(1) per write
+            for compactEvery in the order of V + E '''
+        if graphState.writes < self.compactEvery:
+            return graphState
+        return self._computeGraph(self.vertices.getMembers(), self.edges.getMembers())
+
+    def _computeGraph(self, vertices, edges):
+        ''' Build the CSR arrays from the latest vertices and edges, with an empty delta '''
+        return CSRAdjacency(vertices, edges)
@@ -0,0 +1,147 @@
+import pickle
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from .LWWElementSet import LWWElementSet
+
+MICROSECOND = timedelta(microseconds=1)
+
+def encodeTimestamp(timestamp):
+    ''' Microseconds since datetime.min, so timestamps sort as integers in sqlite '''
+    return (timestamp - datetime.min) // MICROSECOND
+
+def decodeTimestamp(microseconds):
+    return datetime.min + microseconds * MICROSECOND
+
+class LWWTable(object):
+
+    def __init__(self, connection, name, cacheSize):
+        ''' Dict-like view of a sqlite table, hashObj(element) -> (element, datetime), so
+            LWWElementSet.isMember, addElement and removeElement work on it unchanged.
+            The table is clustered on hash, so iteration yields a sorted run. cache keeps
+            the cacheSize most recently used entries in memory '''
+        self.connection = connection
+        self.name = name
+        self.cacheSize = cacheSize
+        self.cache = OrderedDict()
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS {} (hash TEXT PRIMARY KEY,
+            timestamp INTEGER NOT NULL, data BLOB NOT NULL) WITHOUT ROWID'''.format(name))
+
+    def __repr__(self):
+        return "{} ({} entries)".format(self.name, len(self))
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM {}'.format(self.name)).fetchone()[0]
+
+    def __contains__(self, hashElement):
+        return self.get(hashElement) is not None
+
+    def __getitem__(self, hashElement):
+        entry = self.get(hashElement)
+        if entry is None:
+            raise KeyError(hashElement)
+        return entry
+
+    def __setitem__(self, hashElement, entry):
+        ''' Overwrites like a dict does. Runs in O(log n) '''
+        data, timestamp = entry
+        self.connection.execute('INSERT OR REPLACE INTO {} VALUES (?, ?, ?)'.format(self.name),
+            (hashElement, encodeTimestamp(timestamp), pickle.dumps(data)))
+        self._cache(hashElement, entry)
+
+    def get(self, hashElement, default=None):
+        ''' Served from cache if possible, otherwise one indexed lookup. Runs in O(log n) '''
+        if hashElement in self.cache:
+            self.cache.move_to_end(hashElement)
+            return self.cache[hashElement]
+        row = self.connection.execute('SELECT data, timestamp FROM {} WHERE hash = ?'.format(self.name),
+            (hashElement,)).fetchone()
+        if row is None:
+            return default
+        entry = (pickle.loads(row[0]), decodeTimestamp(row[1]))
+        self._cache(hashElement, entry)
+        return entry
+
+    def items(self):
+        ''' Streams (hash, (element, datetime)) sorted by hash, without filling the cache '''
+        cursor = self.connection.execute('SELECT hash, data, timestamp FROM {} ORDER BY hash'.format(self.name))
+        for hashElement, data, timestamp in cursor:
+            yield hashElement, (pickle.loads(data), decodeTimestamp(timestamp))
+
+    def keys(self):
+        cursor = self.connection.execute('SELECT hash FROM {} ORDER BY hash'.format(self.name))
+        return (hashElement for hashElement, in cursor)
+
+    def values(self):
+        return (entry for _, entry in self.items())
+
+    def mergeRun(self, run, batchSize):
+        ''' Upsert a run of (hash, (element, datetime)) sorted by hash, keeping the later
+            timestamp. Sorted input walks the table index in order. Runs in O(n log n) '''
+        upsert = '''INSERT INTO {0} VALUES (?, ?, ?) ON CONFLICT(hash) DO UPDATE SET
+            timestamp = excluded.timestamp, data = excluded.data
+            WHERE excluded.timestamp > {0}.timestamp'''.format(self.name)
+        batch = []
+        for hashElement, (data, timestamp) in run:
+            batch.append((hashElement, encodeTimestamp(timestamp), pickle.dumps(data)))
+            if len(batch) >= batchSize:
+                self.connection.executemany(upsert, batch)
+                batch = []
+        self.connection.executemany(upsert, batch)
+        self.cache.clear()
+
+    def _cache(self, hashElement, entry):
+        self.cache[hashElement] = entry
+        self.cache.move_to_end(hashElement)
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+
+class LWWDiskElementSet(LWWElementSet):
+
+    def __init__(self, path=':memory:', name='lww', cacheSize=4096, batchSize=1024):
+        ''' LWWElementSet whose addSet and removeSet are sqlite tables ({name}_add, {name}_remove)
+            in the file at path, for replicas whose history does not fit in memory. Several sets,
+            e.g. the vertices and edges of a graph, can share one file under different names '''
+        super().__init__()
+        if not name.isidentifier():
+            raise ValueError("{} is not a valid LWWDiskElementSet name".format(name))
+        self.path = path
+        self.batchSize = batchSize
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.addSet = LWWTable(self.connection, name + '_add', cacheSize)
+        self.removeSet = LWWTable(self.connection, name + '_remove', cacheSize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def iterMembers(self):
+        ''' Streams the valid members, joining the sorted addSet and removeSet runs in sqlite.
+            Same rule as isMember, a tie in timestamps goes to the removeSet. Runs in O(n) '''
+        cursor = self.connection.execute('''SELECT a.data FROM {0} a LEFT JOIN {1} r ON r.hash = a.hash
+            WHERE r.timestamp IS NULL OR r.timestamp < a.timestamp ORDER BY a.hash'''.format(
+            self.addSet.name, self.removeSet.name))
+        return (pickle.loads(data) for data, in cursor)
+
+    def getMembers(self):
+        ''' Returns all the valid members, see iterMembers '''
+        return list(self.iterMembers())
+
+    def mergeWith(self, otherLWWElementSet):
+        ''' Merge self with otherLWWElementSet in LWW manner, one transaction. The other set's
+            entries are streamed as sorted runs, an in-memory LWWElementSet is sorted first '''
+        if otherLWWElementSet is self:
+            return
+        with self.connection:
+            self.connection.execute('BEGIN')
+            for selfTable, otherTable in [(self.addSet, otherLWWElementSet.addSet),
+                                          (self.removeSet, otherLWWElementSet.removeSet)]:
+                run = otherTable.items() if isinstance(otherTable, LWWTable) else sorted(otherTable.items(), key=lambda item: item[0])
+                selfTable.mergeRun(run, self.batchSize)
@@ -1,14 +1,17 @@
 from collections import defaultdict
 from .LWWElementSet import LWWElementSet, hashObj
+from .ChangeFeed import ChangeFeed, VertexAdded, VertexRemoved, EdgeAdded, EdgeRemoved
 
 class LWWElementGraph(object):
     
     def __init__(self):
         ''' Initializing Vertices and Edges as LWWElementSet. Maintaining live updating
-            graphState to optimize reads (getNeighborsOf, findPath) ''' 
+            graphState to optimize reads (getNeighborsOf, findPath). changeFeed is only
+            created on the first subscribe ''' 
         self.vertices = LWWElementSet()
         self.edges = LWWElementSet()
         self.graphState = defaultdict(list)
+        self.changeFeed = None
 
     def __repr__(self):
         return "Graph: \n{} \nHistory: \nVertices: \n{}\n Edges: \n{}".format(self.graphState, self.vertices, self.edges) 
@@ -18,6 +21,7 @@ class LWWElementGraph(object):
             Runs in O(1)'''
         self.vertices.addElement(vertex)
         self.graphState[hashObj(vertex)]
+        self._publish(VertexAdded(vertex))
 
     def removeVertex(self, vertex):
         ''' If vertex is present, then add it to vertices.removeSet. Add each of its edge to 
@@ -27,8 +31,11 @@ class LWWElementGraph(object):
             raise KeyError("Vertex {} not in LWWElementGraph".format(vertex))
         self.vertices.removeElement(vertex)
         for edgeSet in self.edges.getMembers():
-            self.edges.removeElement(edgeSet) if vertex in edgeSet else None
+            if vertex in edgeSet:
+                self.edges.removeElement(edgeSet)
+                self._publish(EdgeRemoved(*self._edgeEnds(edgeSet))) if self.changeFeed else None
         self.graphState = self._removeVertex(self.graphState, vertex)
+        self._publish(VertexRemoved(vertex))
         
     def addEdge(self, vertex1, vertex2):
         ''' If vertex1, vertex2 present, add edge to edges.addSet. Maintain graphState 
@@ -39,6 +46,7 @@ class LWWElementGraph(object):
             raise KeyError("Vertex {} not in LWWElementGraph".format(vertex2))
         self.edges.addElement({vertex1, vertex2})
         self.graphState = self._addEdge(self.graphState, vertex1, vertex2)
+        self._publish(EdgeAdded(*self._edgeEnds({vertex1, vertex2}), None)) if self.changeFeed else None
 
     def removeEdge(self, vertex1, vertex2):
         ''' If edge present, add it to edges.removeSet. Maintain graphState.
@@ -48,6 +56,7 @@ class LWWElementGraph(object):
             raise KeyError("Edge {}-{} not in LWWElementGraph".format(vertex1, vertex2))
         self.edges.removeElement(edgeSet)
         self.graphState = self._removeEdge(self.graphState, vertex1, vertex2)
+        self._publish(EdgeRemoved(*self._edgeEnds(edgeSet))) if self.changeFeed else None
 
     def isMember(self, vertex):
         ''' Check if vertex is valid, runs in O(1) '''
@@ -87,12 +96,67 @@ class LWWElementGraph(object):
     def mergeGraphs(self, otherGraph):
         ''' Merging Graphs by merging their Vertice and Edge LLWSet. Remove Edge if Vertex not present
             anymore after merge. Recompute the internal graphState as well. Runs in O(V + E)'''
+        before = self._snapshot() if self.changeFeed else None
         self.vertices.mergeWith(otherGraph.vertices)
         self.edges.mergeWith(otherGraph.edges)
-        for v1, v2 in self.edges.getMembers():
+        for edgeSet in self.edges.getMembers():
+            v1, v2 = self._edgeEnds(edgeSet)
             if not self.vertices.isMember(v1) or not self.vertices.isMember(v2):
-                self.edges.removeElement({v1, v2})
+                self.edges.removeElement(edgeSet)
         self.graphState = self._computeGraph(self.vertices.getMembers(), self.edges.getMembers())
+        self._publishMerge(before) if before else None
+
+    def subscribe(self, callback):
+        ''' callback(event) is called with VertexAdded, VertexRemoved, EdgeAdded or EdgeRemoved
+            after every mutation, including the net changes of mergeGraphs '''
+        if self.changeFeed is None:
+            self.changeFeed = ChangeFeed()
+        return self.changeFeed.subscribe(callback)
+
+    def unsubscribe(self, callback):
+        ''' Raises KeyError if callback is not subscribed, also before the first subscribe '''
+        if self.changeFeed is None:
+            raise KeyError("Callback {} not subscribed to ChangeFeed".format(callback))
+        self.changeFeed.unsubscribe(callback)
+
+    def stream(self, maxsize=1024):
+        ''' Same events as subscribe, as an async iterator. Buffers at most maxsize events,
+            coalescing events for the same vertex or edge. Call close() on it to stop '''
+        if self.changeFeed is None:
+            self.changeFeed = ChangeFeed()
+        return self.changeFeed.stream(maxsize)
+
+    def _publish(self, event):
+        ''' No-op until someone subscribes. Callers whose event is costly to build, like the
+            hashObj ordered ends of an undirected edge, check changeFeed first '''
+        if self.changeFeed:
+            self.changeFeed.publish(event)
+
+    def _edgeEnds(self, edge):
+        ''' (vertex1, vertex2) of a stored edge, ordered by hashObj so every event for an
+            undirected edge names the same direction whatever the set order is. A self-loop
+            collapses into a single element set '''
+        ends = tuple(sorted(edge, key=hashObj))
+        return ends if len(ends) == 2 else ends * 2
+
+    def _snapshot(self):
+        ''' Members keyed by hash, edges as (vertex1, vertex2, weight). Runs in O(V + E) '''
+        vertices = {hashObj(v): v for v in self.vertices.getMembers()}
+        edges = {hashObj(e): self._edgeEnds(e) + (None,) for e in self.edges.getMembers()}
+        return vertices, edges
+
+    def _publishMerge(self, before):
+        ''' Publish the net difference between the snapshot taken before a merge and now.
+            Removals go first, and edges are removed before / added after their vertices '''
+        (oldVertices, oldEdges), (newVertices, newEdges) = before, self._snapshot()
+        for h, (v1, v2, _) in oldEdges.items():
+            self._publish(EdgeRemoved(v1, v2)) if h not in newEdges else None
+        for h, v in oldVertices.items():
+            self._publish(VertexRemoved(v)) if h not in newVertices else None
+        for h, v in newVertices.items():
+            self._publish(VertexAdded(v)) if h not in oldVertices else None
+        for h, edge in newEdges.items():
+            self._publish(EdgeAdded(*edge)) if h not in oldEdges or oldEdges[h][2] != edge[2] else None
 
     def _removeVertex(self, graphState, vertex):
         ''' Runs in O(E) '''
@@ -114,8 +178,9 @@ class LWWElementGraph(object):
 
     def _computeGraph(self, vertices, edges):
         ''' Calculate the graphState using latest vertices and edges. Initialize the Vertices first, 
-            since there be some vertices with no edges. Runs in O(V + E)'''
+            since there be some vertices with no edges. A self-loop is a single element set, and
+            is listed twice like _addEdge does. Runs in O(V + E)'''
         graphState = defaultdict(list)
         for v in vertices: graphState[hashObj(v)]
-        for a,b in edges: graphState[hashObj(a)].append(b); graphState[hashObj(b)].append(a)
+        for a,b in map(self._edgeEnds, edges): graphState[hashObj(a)].append(b); graphState[hashObj(b)].append(a)
         return graphState
\ No newline at end of file
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from datetime import datetime
+from heapq import heappush, heappop
+from itertools import count
+from .LWWElementSet import hashObj
+from .LWWElementGraph import LWWElementGraph
+from .ChangeFeed import EdgeAdded, EdgeRemoved
+
+class LWWWeightedGraph(LWWElementGraph):
+
+    def __init__(self):
+        ''' Directed, weighted LWWElementGraph. Edges are stored as (vertex1, vertex2) tuples
+            in the edges LWWElementSet, so direction and self-loops are kept. Weights are a
+            LWW register per edge, weights[hashObj(edge)] = (weight, datetime) '''
+        super().__init__()
+        self.weights = {}
+
+    def __repr__(self):
+        return "{} \nWeights: \n{}".format(super().__repr__(), self.weights)
+
+    def addEdge(self, vertex1, vertex2, weight=1):
+        ''' If vertex1, vertex2 present, add directed edge to edges.addSet and write its weight
+            to the weights register. Re-adding an edge updates its weight. Runs in O(1) '''
+        if not self.vertices.isMember(vertex1):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex1))
+        elif not self.vertices.isMember(vertex2):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex2))
+        elif not weight >= 0:
+            raise ValueError("Edge {}->{} needs a non-negative weight, got {}".format(vertex1, vertex2, weight))
+        edge = (vertex1, vertex2)
+        isNewEdge = not self.edges.isMember(edge)
+        self.edges.addElement(edge)
+        self.weights[hashObj(edge)] = (weight, datetime.now())
+        if isNewEdge:
+            self.graphState = self._addEdge(self.graphState, vertex1, vertex2)
+        self._publish(EdgeAdded(vertex1, vertex2, weight))
+
+    def removeEdge(self, vertex1, vertex2):
+        ''' If directed edge present, add it to edges.removeSet. Maintain graphState.
+            Runs in O(deg(vertex1)) '''
+        edge = (vertex1, vertex2)
+        if not self.edges.isMember(edge):
+            raise KeyError("Edge {}->{} not in LWWElementGraph".format(vertex1, vertex2))
+        self.edges.removeElement(edge)
+        self.graphState = self._removeEdge(self.graphState, vertex1, vertex2)
+        self._publish(EdgeRemoved(vertex1, vertex2))
+
+    def getWeight(self, vertex1, vertex2):
+        ''' Last written weight of the directed edge vertex1->vertex2, runs in O(1) '''
+        edge = (vertex1, vertex2)
+        if not self.edges.isMember(edge):
+            raise KeyError("Edge {}->{} not in LWWElementGraph".format(vertex1, vertex2))
+        return self.weights[hashObj(edge)][self.edges.iData]
+
+    def findShortestPath(self, vertex1, vertex2):
+        ''' Dijkstra's shortest path using a binary heap. findPath (BFS) is still available
+            for hop count. Runs in O((V + E) log V) '''
+        return self._bestFirstSearch(vertex1, vertex2, lambda vertex, goal: 0)
+
+    def findPathAStar(self, vertex1, vertex2, heuristic):
+        ''' A* shortest path. heuristic(vertex, goal) must never overestimate the remaining
+            weight, otherwise the returned path may not be the shortest. A vertex reached again
+            by a shorter path is reopened, so the heuristic need not be consistent '''
+        return self._bestFirstSearch(vertex1, vertex2, heuristic)
+
+    def mergeGraphs(self, otherGraph):
+        ''' Merging Graphs by merging their Vertice and Edge LLWSet, and weights register in LWW
+            manner. Remove Edge if Vertex not present anymore after merge. Recompute graphState.
+            Runs in O(V + E)'''
+        before = self._snapshot() if self.changeFeed else None
+        self.vertices.mergeWith(otherGraph.vertices)
+        self.edges.mergeWith(otherGraph.edges)
+        self.weights = self.edges.mergeSet(self.weights, otherGraph.weights)
+        for v1, v2 in self.edges.getMembers():
+            if not self.vertices.isMember(v1) or not self.vertices.isMember(v2):
+                self.edges.removeElement((v1, v2))
+        self.graphState = self._computeGraph(self.vertices.getMembers(), self.edges.getMembers())
+        self._publishMerge(before) if before else None
+
+    def _bestFirstSearch(self, vertex1, vertex2, heuristic):
+        ''' Shared by Dijkstra and A*. Heap entries carry a counter so vertices themselves
+            are never compared, and the distance they were pushed with. An entry is stale, and
+            skipped, once a shorter distance to its vertex was found '''
+        if not self.vertices.isMember(vertex1):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex1))
+        elif not self.vertices.isMember(vertex2):
+            raise KeyError("Vertex {} not in LWWElementGraph".format(vertex2))
+        iWeight, tieBreak = self.edges.iData, count()
+        start, goal = hashObj(vertex1), hashObj(vertex2)
+        frontier = [(heuristic(vertex1, vertex2), next(tieBreak), 0, start, vertex1)]
+        distance, ancestory = {start: 0}, {}
+        while frontier:
+            _, _, nodeDistance, hashNode, node = heappop(frontier)
+            if nodeDistance > distance[hashNode]:
+                continue
+            if hashNode == goal:
+                path = [node]
+                while hashNode in ancestory:
+                    node = ancestory[hashNode]
+                    hashNode = hashObj(node)
+                    path.append(node)
+                return path[::-1]
+            for ngbr in self.graphState[hashNode]:
+                hashNgbr = hashObj(ngbr)
+                ngbrDistance = nodeDistance + self.weights[hashObj((node, ngbr))][iWeight]
+                if hashNgbr not in distance or ngbrDistance < distance[hashNgbr]:
+                    distance[hashNgbr], ancestory[hashNgbr] = ngbrDistance, node
+                    heappush(frontier, (ngbrDistance + heuristic(ngbr, vertex2), next(tieBreak), ngbrDistance, hashNgbr, ngbr))
+        return []
+
+    def _edgeEnds(self, edge):
+        ''' Edges are directed (vertex1, vertex2) tuples already '''
+        return edge
+
+    def _snapshot(self):
+        ''' Edges carry their weight, so a merge that only changes a weight publishes EdgeAdded '''
+        vertices = {hashObj(v): v for v in self.vertices.getMembers()}
+        edges = {hashObj(e): e + (self.weights[hashObj(e)][self.edges.iData],) for e in self.edges.getMembers()}
+        return vertices, edges
+
+    def _addEdge(self, graphState, vertex1, vertex2):
+        '''  Only vertex1 gets an adjacency entry. Runs in O(1) '''
+        graphState[hashObj(vertex1)].append(vertex2)
+        return graphState
+
+    def _removeEdge(self, graphState, vertex1, vertex2):
+        '''  Runs in O(deg(vertex1)) '''
+        graphState[hashObj(vertex1)].remove(vertex2)
+        return graphState
+
+    def _computeGraph(self, vertices, edges):
+        ''' Calculate the directed graphState using latest vertices and edges. Runs in O(V + E)'''
+        graphState = defaultdict(list)
+        for v in vertices: graphState[hashObj(v)]
+        for a,b in edges: graphState[hashObj(a)].append(b)
+        return graphState
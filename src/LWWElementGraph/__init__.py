@@ -0,0 +1,5 @@
+''' Importing the package loads nothing. Every class lives in its own submodule, e.g.
+    from LWWElementGraph.LWWElementGraph import LWWElementGraph, so workers only pay for
+    what they use. Optional engines (asyncio, storage, NumPy, ...) must be imported inside
+    the submodule that needs them, or at first use, never from LWWElementGraph or
+    LWWElementSet. tests/testStartup.py guards this '''
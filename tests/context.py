@@ -5,4 +5,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 SRC_PATH = 'src.LWWElementGraph'
 
 from src.LWWElementGraph.LWWElementSet import LWWElementSet, hashObj
-from src.LWWElementGraph.LWWElementGraph import LWWElementGraph
\ No newline at end of file
+from src.LWWElementGraph.LWWElementGraph import LWWElementGraph
+from src.LWWElementGraph.LWWWeightedGraph import LWWWeightedGraph
+from src.LWWElementGraph.ChangeFeed import ChangeFeed, VertexAdded, VertexRemoved, EdgeAdded, EdgeRemoved
+from src.LWWElementGraph.LWWDiskElementSet import LWWDiskElementSet, LWWTable
+try:
+    from src.LWWElementGraph.LWWCSRGraph import LWWCSRGraph, CSRAdjacency
+except ImportError:  # numpy is an optional dependency
+    LWWCSRGraph = CSRAdjacency = None
\ No newline at end of file
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase, mock
+from context import LWWElementGraph, LWWWeightedGraph, ChangeFeed, VertexAdded, VertexRemoved, EdgeAdded, EdgeRemoved, hashObj, SRC_PATH
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# String vertices iterate in a different order per PYTHONHASHSEED when stored in a set
+UNDIRECTED_EDGE_EVENTS = '''
+import json
+from LWWElementGraph.LWWElementGraph import LWWElementGraph
+g, events = LWWElementGraph(), []
+g.subscribe(lambda event: events.append([type(event).__name__] + list(event)))
+subscription = g.stream()
+for v in 'xy':
+    g.addVertex(v)
+g.addEdge('x', 'y')
+g.removeVertex('x')
+print(json.dumps([events, len(subscription.pending)]))
+'''
+
+
+class ChangeFeedTests(TestCase):
+
+    def testSubscribe(self):
+        ''' Callbacks receive every published event until unsubscribed '''
+        feed, callback = ChangeFeed(), mock.MagicMock()
+        self.assertEqual(len(feed), 0)
+        feed.subscribe(callback)
+        feed.publish(VertexAdded('a'))
+        feed.unsubscribe(callback)
+        feed.publish(VertexAdded('b'))
+        callback.assert_called_once_with(VertexAdded('a'))
+
+    def testCallbackRaises(self):
+        ''' A failing callback is logged, and the other callbacks and streams still get the event '''
+        feed, callback = ChangeFeed(), mock.MagicMock()
+        feed.subscribe(mock.MagicMock(side_effect=RuntimeError('index down')))
+        feed.subscribe(callback)
+        subscription = feed.stream(10)
+        with self.assertLogs('src.LWWElementGraph.ChangeFeed', level='ERROR'):
+            feed.publish(VertexAdded('a'))
+        callback.assert_called_once_with(VertexAdded('a'))
+        self.assertListEqual(list(subscription.pending.values()), [VertexAdded('a')])
+
+    def testGraphWriteSurvivesCallback(self):
+        ''' The writer does not see a callback's exception '''
+        g = LWWElementGraph()
+        g.subscribe(mock.MagicMock(side_effect=RuntimeError('index down')))
+        with self.assertLogs('src.LWWElementGraph.ChangeFeed', level='ERROR'):
+            g.addVertex('a')
+        self.assertTrue(g.isMember('a'))
+
+    def testStreamCoalesces(self):
+        ''' A pending event for the same vertex or edge is replaced and moved to the back '''
+        subscription = ChangeFeed().stream(10)
+        for event in [VertexAdded('a'), VertexAdded('b'), VertexRemoved('a'), EdgeAdded('a', 'b', 1), EdgeAdded('a', 'b', 2)]:
+            subscription.feed.publish(event)
+        self.assertListEqual(list(subscription.pending.values()), [VertexAdded('b'), VertexRemoved('a'), EdgeAdded('a', 'b', 2)])
+        self.assertEqual(subscription.dropped, 0)
+
+    def testStreamBounded(self):
+        ''' When full of other keys, the oldest pending event is dropped and counted '''
+        subscription = ChangeFeed().stream(2)
+        for v in range(5):
+            subscription.feed.publish(VertexAdded(v))
+        self.assertListEqual(list(subscription.pending.values()), [VertexAdded(3), VertexAdded(4)])
+        self.assertEqual(subscription.dropped, 3)
+
+    def testStreamAsyncIterator(self):
+        ''' Consumer waits for events published later, and stops after close() '''
+        feed = ChangeFeed()
+        subscription = feed.stream(10)
+
+        async def consume():
+            return [event async for event in subscription]
+
+        async def produce():
+            await asyncio.sleep(0)
+            feed.publish(VertexAdded('a'))
+            await asyncio.sleep(0)
+            feed.publish(VertexAdded('b'))
+            subscription.close()
+
+        async def main():
+            events, _ = await asyncio.gather(consume(), produce())
+            return events
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertListEqual(loop.run_until_complete(main()), [VertexAdded('a'), VertexAdded('b')])
+        finally:
+            loop.close()
+        self.assertEqual(len(feed), 0)
+
+
+class GraphChangeFeedTests(TestCase):
+
+    def testGraphMutations(self):
+        ''' Every graph write publishes a typed event, removeVertex also for its edges '''
+        g, events = LWWElementGraph(), []
+        g.subscribe(events.append)
+        g.addVertex(1)
+        g.addVertex(2)
+        g.addEdge(1, 2)
+        g.removeEdge(1, 2)
+        g.addEdge(2, 1)
+        g.removeVertex(1)
+        v1, v2 = sorted([1, 2], key=hashObj)
+        self.assertListEqual(events, [
+            VertexAdded(1), VertexAdded(2), EdgeAdded(v1, v2, None), EdgeRemoved(v1, v2),
+            EdgeAdded(v1, v2, None), EdgeRemoved(v1, v2), VertexRemoved(1),
+        ])
+
+    def testUndirectedEdgeDirectionIsCanonical(self):
+        ''' Add and remove of an undirected edge name the same direction under every hash
+            seed, so a stream coalesces them into one pending event next to x and y '''
+        results = []
+        for seed in range(4):
+            env = dict(os.environ, PYTHONHASHSEED=str(seed))
+            output = subprocess.check_output([sys.executable, '-c', UNDIRECTED_EDGE_EVENTS], cwd=SRC_DIR, env=env)
+            results.append(json.loads(output.decode('utf-8')))
+        v1, v2 = sorted('xy', key=hashObj)
+        expected = [[
+            ['VertexAdded', 'x'], ['VertexAdded', 'y'], ['EdgeAdded', v1, v2, None],
+            ['EdgeRemoved', v1, v2], ['VertexRemoved', 'x'],
+        ], 3]
+        for result in results:
+            self.assertListEqual(result, expected)
+
+    def testUnsubscribeUnknownCallback(self):
+        ''' Unknown callbacks raise KeyError, whether or not the graph has a ChangeFeed yet '''
+        g, callback = LWWElementGraph(), mock.MagicMock()
+        with self.assertRaises(KeyError):
+            g.unsubscribe(callback)
+        g.subscribe(mock.MagicMock())
+        with self.assertRaises(KeyError):
+            g.unsubscribe(callback)
+
+    def testNoFeedUntilSubscribe(self):
+        ''' Graphs without subscribers do not pay for a ChangeFeed '''
+        g = LWWElementGraph()
+        g.addVertex(1)
+        self.assertIsNone(g.changeFeed)
+
+    @mock.patch('{}.LWWElementGraph.LWWElementGraph._edgeEnds'.format(SRC_PATH))
+    def testNoEventsBuiltWithoutSubscribers(self, mockEdgeEnds):
+        ''' Edge writes do not order edge ends for events nobody receives, before the first
+            subscribe or after the last unsubscribe '''
+        g = LWWElementGraph()
+        for v in range(3):
+            g.addVertex(v)
+        g.addEdge(0, 1)
+        g.addEdge(1, 2)
+        g.removeEdge(0, 1)
+        g.removeVertex(1)
+        g.unsubscribe(g.subscribe(mock.MagicMock()))
+        g.addEdge(0, 2)
+        mockEdgeEnds.assert_not_called()
+
+    def testMergePublishesNetChanges(self):
+        ''' mergeGraphs publishes the difference before and after the merge '''
+        g1, g2 = LWWElementGraph(), LWWElementGraph()
+        for v in range(3):
+            g1.addVertex(v)
+            g2.addVertex(v)
+        g1.addEdge(0, 1)
+        g2.removeVertex(0)
+        g2.addEdge(1, 2)
+        events = []
+        g1.subscribe(events.append)
+        g1.mergeGraphs(g2)
+        self.assertListEqual(events, [
+            EdgeRemoved(*sorted([0, 1], key=hashObj)), VertexRemoved(0), EdgeAdded(*sorted([1, 2], key=hashObj), None),
+        ])
+
+    def testWeightedMergePublishesWeightChange(self):
+        ''' A merge that only changes the weight of an edge publishes EdgeAdded '''
+        g1, g2 = LWWWeightedGraph(), LWWWeightedGraph()
+        for v in range(2):
+            g1.addVertex(v)
+            g2.addVertex(v)
+        g1.addEdge(0, 1, 4)
+        g2.addEdge(0, 1, 7)
+        events = []
+        g1.subscribe(events.append)
+        g1.mergeGraphs(g2)
+        self.assertListEqual(events, [EdgeAdded(0, 1, 7)])
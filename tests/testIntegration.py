@@ -58,6 +58,23 @@ class IntegrationTests(TestCase):
         self.assertListEqual(firstGraph.edges.getMembers(), [])
         self.assertEqual(len(firstGraph.graphState), 2)
 
+    def testSelfLoopMerge(self):
+        ''' A self-loop, stored as a single element set, survives a merge into another replica
+            and is listed the same way as after addEdge '''
+        firstGraph = LWWElementGraph()
+        secondGraph = LWWElementGraph()
+        for v in 'ab':
+            firstGraph.addVertex(v)
+        firstGraph.addEdge('a', 'a')
+        firstGraph.addEdge('a', 'b')
+
+        secondGraph.mergeGraphs(firstGraph)
+        self.assertCountEqual(secondGraph.getNeighborsOf('a'), firstGraph.getNeighborsOf('a'))
+        self.assertListEqual(secondGraph.findPath('b', 'a'), ['b', 'a'])
+        secondGraph.removeVertex('a')
+        self.assertListEqual(secondGraph.edges.getMembers(), [])
+        self.assertListEqual(secondGraph.getNeighborsOf('b'), [])
+
     def testRemovedEdgeMerge(self):
         ''' Removing an Edge on the Second Graph should  
             remove that Edge on the Merged Graph '''
@@ -0,0 +1,154 @@
+from unittest import TestCase, skipIf
+from random import Random
+from context import LWWElementGraph, LWWCSRGraph, CSRAdjacency, hashObj
+
+
+def buildRandomGraphs(seed, compactEvery):
+    ''' Same random writes on a LWWElementGraph and a LWWCSRGraph '''
+    rng = Random(seed)
+    g, csr = LWWElementGraph(), LWWCSRGraph(compactEvery)
+    for v in range(30):
+        g.addVertex(v)
+        csr.addVertex(v)
+    for _ in range(80):
+        v1, v2 = rng.sample(range(30), 2)
+        if g.edges.isMember({v1, v2}):
+            g.removeEdge(v1, v2)
+            csr.removeEdge(v1, v2)
+        else:
+            g.addEdge(v1, v2)
+            csr.addEdge(v1, v2)
+    for v in rng.sample(range(30), 3):
+        g.removeVertex(v)
+        csr.removeVertex(v)
+    return g, csr
+
+@skipIf(LWWCSRGraph is None, 'numpy not installed')
+class CSRAdjacencyTests(TestCase):
+
+    def testBuild(self):
+        ''' Offsets and neighbours follow the edge order, like LWWElementGraph._computeGraph '''
+        adjacency = CSRAdjacency(['a', 'b', 'c', 'd'], [('a', 'b'), ('a', 'c'), ('b', 'c')])
+        self.assertListEqual(adjacency.offsets.tolist(), [0, 2, 4, 6, 6])
+        self.assertListEqual(adjacency.neighbors.tolist(), [1, 2, 0, 2, 0, 1])
+        self.assertListEqual(adjacency[hashObj('c')], ['a', 'b'])
+        self.assertListEqual(adjacency[hashObj('d')], [])
+        self.assertEqual(len(adjacency), 4)
+
+    def testDeltaLayer(self):
+        ''' Writes after the build are visible through the delta layer '''
+        adjacency = CSRAdjacency(['a', 'b', 'c'], [('a', 'b')])
+        adjacency.addVertex('d')
+        adjacency.addEdge('a', 'd')
+        adjacency.removeEdge('a', 'b')
+        adjacency.addEdge('a', 'b')
+        adjacency.addEdge('a', 'b')
+        self.assertListEqual(adjacency[hashObj('a')], ['b', 'd'])
+        adjacency.removeVertex('a')
+        self.assertNotIn(hashObj('a'), adjacency)
+        self.assertListEqual(adjacency[hashObj('d')], [])
+        adjacency.addVertex('a')
+        self.assertListEqual(adjacency[hashObj('a')], [])
+        self.assertEqual(adjacency.writes, 7)
+
+    def testFindPath(self):
+        ''' BFS over the arrays finds the same path with and without a delta layer '''
+        edges = [(1, 2), (2, 3), (2, 4), (3, 5), (4, 5), (5, 6), (5, 7), (6, 7)]
+        adjacency = CSRAdjacency(range(1, 9), edges)
+        self.assertListEqual(adjacency.findPath(1, 7), [1, 2, 3, 5, 7])
+        self.assertListEqual(adjacency.findPath(1, 1), [1])
+        self.assertListEqual(adjacency.findPath(1, 8), [])
+        adjacency.addEdge(1, 8)
+        self.assertListEqual(adjacency.findPath(1, 7), [1, 2, 3, 5, 7])
+        adjacency.addEdge(8, 7)
+        self.assertListEqual(adjacency.findPath(1, 7), [1, 8, 7])
+        adjacency.removeVertex(8)
+        adjacency.removeEdge(3, 5)
+        adjacency.addVertex(9)
+        adjacency.addEdge(9, 7)
+        adjacency.addEdge(1, 9)
+        self.assertListEqual(adjacency.findPath(1, 7), [1, 9, 7])
+        self.assertListEqual(adjacency.findPath(3, 6), [3, 2, 4, 5, 6])
+
+    def testFindPathMatchesNeighborIds(self):
+        ''' With a dirty delta layer, the array BFS matches a FIFO BFS over neighborIds '''
+        rng = Random(3)
+        adjacency = CSRAdjacency(range(40), [tuple(rng.sample(range(40), 2)) for _ in range(60)])
+        for v in range(40, 45):
+            adjacency.addVertex(v)
+        for _ in range(40):
+            i, j = rng.sample(range(45), 2)
+            adjacency.removeEdge(i, j) if j in adjacency.neighborIds(i) else adjacency.addEdge(i, j)
+        adjacency.removeVertex(7)
+        for goal in range(45):
+            parents, frontier = {0: 0}, [0]
+            for i in frontier:
+                for j in adjacency.neighborIds(i):
+                    if j not in parents:
+                        parents[j] = i
+                        frontier.append(j)
+            path = [goal] if goal in parents else []
+            while path and path[-1] != 0:
+                path.append(parents[path[-1]])
+            self.assertListEqual(adjacency.findPath(0, goal), path[::-1])
+
+@skipIf(LWWCSRGraph is None, 'numpy not installed')
+class LWWCSRGraphTests(TestCase):
+
+    def testMatchesLWWElementGraph(self):
+        ''' Neighbours and paths match LWWElementGraph with and without compaction '''
+        for compactEvery in [10**6, 7]:
+            g, csr = buildRandomGraphs(seed=compactEvery, compactEvery=compactEvery)
+            members = g.vertices.getMembers()
+            for v in range(30):
+                self.assertEqual(g.isMember(v), csr.isMember(v))
+                if g.isMember(v):
+                    self.assertCountEqual(g.getNeighborsOf(v), csr.getNeighborsOf(v))
+            for v1 in members[:5]:
+                for v2 in members:
+                    self.assertEqual(len(g.findPath(v1, v2)), len(csr.findPath(v1, v2)))
+
+    def testCompaction(self):
+        ''' The delta layer is folded into new arrays every compactEvery writes '''
+        csr = LWWCSRGraph(compactEvery=3)
+        csr.addVertex(1)
+        csr.addVertex(2)
+        self.assertEqual(csr.graphState.writes, 2)
+        csr.addEdge(1, 2)
+        self.assertEqual(csr.graphState.writes, 0)
+        self.assertListEqual(csr.graphState.neighbors.tolist(), [1, 0])
+        self.assertListEqual(csr.findPath(1, 2), [1, 2])
+
+    def testSelfLoop(self):
+        ''' A self-loop is one arc in the arrays and survives compaction and merges '''
+        csr = LWWCSRGraph(compactEvery=2)
+        csr.addVertex('a')
+        csr.addEdge('a', 'a')
+        csr.addVertex('b')
+        self.assertListEqual(csr.graphState.neighbors.tolist(), [0])
+        self.assertListEqual(csr.getNeighborsOf('a'), ['a'])
+        csr.removeEdge('a', 'a')
+        self.assertListEqual(csr.getNeighborsOf('a'), [])
+        csr.addEdge('a', 'a')
+        self.assertListEqual(csr.getNeighborsOf('a'), ['a'])
+        other = LWWCSRGraph()
+        other.mergeGraphs(csr)
+        self.assertListEqual(other.getNeighborsOf('a'), ['a'])
+        csr.removeVertex('a')
+        self.assertFalse(csr.isMember('a'))
+        self.assertListEqual(csr.edges.getMembers(), [])
+
+    def testMergeGraphs(self):
+        ''' mergeGraphs rebuilds the arrays from the merged vertices and edges '''
+        g1, g2 = LWWCSRGraph(), LWWCSRGraph()
+        for v in range(4):
+            g1.addVertex(v)
+            g2.addVertex(v)
+        g1.addEdge(0, 1)
+        g2.addEdge(1, 2)
+        g2.removeVertex(3)
+        g1.mergeGraphs(g2)
+        self.assertTrue(isinstance(g1.graphState, CSRAdjacency))
+        self.assertEqual(g1.graphState.writes, 0)
+        self.assertFalse(g1.isMember(3))
+        self.assertListEqual(g1.findPath(0, 2), [0, 1, 2])
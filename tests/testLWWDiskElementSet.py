@@ -0,0 +1,106 @@
+import os
+import tempfile
+from unittest import TestCase
+from datetime import datetime
+from random import random
+from context import LWWDiskElementSet, LWWElementSet, LWWTable, hashObj
+
+
+def createComplexObj():
+    ''' Outputs a complex Python dictionary obj with embedded dict, list, string and float '''
+    return [{
+            'timestamp' : [ random() * 10**4],
+            'event': {
+                    'ABS_MT_POSITION_X': '{}'.format(int(random() * 10**8)),
+                    'ABS_MT_POSITION_Y': '{}'.format(int(random() * 10**8)),
+                }
+    }]
+
+class LWWDiskElementSetTests(TestCase):
+
+    def setUp(self):
+        self.l = LWWDiskElementSet()
+
+    def tearDown(self):
+        self.l.close()
+
+    def testInit(self):
+        ''' addSet and removeSet are empty sqlite tables '''
+        self.assertTrue(isinstance(self.l.addSet, LWWTable))
+        self.assertEqual(len(self.l.addSet), 0)
+        self.assertEqual(len(self.l.removeSet), 0)
+        with self.assertRaises(ValueError):
+            LWWDiskElementSet(name='lww; DROP TABLE lww_add')
+
+    def testAddRemove(self):
+        ''' Same semantics as LWWElementSet, including for complex objects '''
+        complexObj = createComplexObj()
+        with self.assertRaises(KeyError):
+            self.l.removeElement(complexObj)
+        self.l.addElement(complexObj)
+        self.assertTrue(self.l.isMember(complexObj))
+        self.assertEqual(self.l.addSet[hashObj(complexObj)][self.l.iData], complexObj)
+        self.l.removeElement(complexObj)
+        self.assertFalse(self.l.isMember(complexObj))
+        self.l.addElement(complexObj)
+        self.assertTrue(self.l.isMember(complexObj))
+
+    def testTimestampRoundTrip(self):
+        ''' Timestamps are stored as integers without losing microseconds '''
+        timestamp = datetime(2021, 7, 10, 1, 2, 3, 456789)
+        self.l.addSet[hashObj(4)] = (4, timestamp)
+        self.l.addSet.cache.clear()
+        self.assertEqual(self.l.addSet[hashObj(4)], (4, timestamp))
+
+    def testCacheIsBounded(self):
+        ''' Only the cacheSize most recently used entries stay in memory '''
+        l = LWWDiskElementSet(cacheSize=2)
+        for i in range(5):
+            l.addElement(i)
+        self.assertListEqual(list(l.addSet.cache.keys()), [hashObj(3), hashObj(4)])
+        self.assertTrue(l.isMember(0))
+        self.assertEqual(len(l.addSet.cache), 2)
+        l.close()
+
+    def testGetMembers(self):
+        ''' Members are streamed from a join of addSet and removeSet, ties go to removeSet '''
+        dt1, dt2 = datetime(2021, 7, 10), datetime(2021, 7, 11)
+        self.l.addSet[hashObj(4)] = (4, dt1)
+        self.l.addSet[hashObj(5)] = (5, dt2)
+        self.l.addSet[hashObj(6)] = (6, dt1)
+        self.l.removeSet[hashObj(4)] = (4, dt2)
+        self.l.removeSet[hashObj(5)] = (5, dt1)
+        self.l.removeSet[hashObj(6)] = (6, dt1)
+        self.assertListEqual(self.l.getMembers(), [5])
+        self.assertListEqual(LWWElementSet.getMembers(self.l), [5])
+
+    def testMergeWith(self):
+        ''' Later timestamp wins whether the other set is on disk or in memory '''
+        dt1, dt2, dt3 = datetime(2021, 7, 10), datetime(2021, 7, 11), datetime(2021, 7, 12)
+        disk, memory = LWWDiskElementSet(batchSize=1), LWWElementSet()
+        self.l.addSet[hashObj(3)] = (3, dt1)
+        self.l.addSet[hashObj(4)] = (4, dt2)
+        disk.addSet[hashObj(4)] = (4, dt1)
+        disk.addSet[hashObj(5)] = (5, dt1)
+        disk.removeSet[hashObj(5)] = (5, dt2)
+        memory.addSet[hashObj(3)] = (3, dt3)
+        memory.addSet[hashObj(6)] = (6, dt1)
+        self.l.mergeWith(disk)
+        self.l.mergeWith(memory)
+        self.l.mergeWith(self.l)
+        self.assertEqual(self.l.addSet[hashObj(3)], (3, dt3))
+        self.assertEqual(self.l.addSet[hashObj(4)], (4, dt2))
+        self.assertCountEqual(self.l.getMembers(), [3, 4, 6])
+        memory.mergeWith(disk)
+        self.assertCountEqual(memory.getMembers(), [3, 4, 6])
+        disk.close()
+
+    def testPersistence(self):
+        ''' Reopening the file gives back the same set. Sets can share a file by name '''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.db')
+            with LWWDiskElementSet(path, name='vertices') as vertices, LWWDiskElementSet(path, name='edges') as edges:
+                vertices.addElement(1)
+                edges.addElement((1, 1))
+            with LWWDiskElementSet(path, name='vertices') as vertices:
+                self.assertListEqual(vertices.getMembers(), [1])
@@ -0,0 +1,120 @@
+from unittest import TestCase, mock
+from context import LWWWeightedGraph, hashObj, SRC_PATH
+
+
+class LWWWeightedGraphTests(TestCase):
+
+    def setUp(self):
+        self.g = LWWWeightedGraph()
+        for v in 'abcde':
+            self.g.addVertex(v)
+
+    def testAddEdgeIsDirected(self):
+        ''' Edge a->b is stored as a tuple, so b->a is not an edge '''
+        self.g.addEdge('a', 'b', 3)
+        self.assertTrue(self.g.edges.isMember(('a', 'b')))
+        self.assertFalse(self.g.edges.isMember(('b', 'a')))
+        self.assertListEqual(self.g.getNeighborsOf('a'), ['b'])
+        self.assertListEqual(self.g.getNeighborsOf('b'), [])
+
+    def testAddEdgeFails(self):
+        ''' Cannot add edge if vertex not present, or with a negative or NaN weight '''
+        with self.assertRaises(KeyError):
+            self.g.addEdge('a', 'z')
+        with self.assertRaises(ValueError):
+            self.g.addEdge('a', 'b', -1)
+        with self.assertRaises(ValueError):
+            self.g.addEdge('a', 'b', float('nan'))
+        self.assertFalse(self.g.edges.isMember(('a', 'b')))
+
+    def testSelfLoop(self):
+        ''' Self-loop is kept as (a, a) and removed along with its vertex '''
+        self.g.addEdge('a', 'a', 2)
+        self.assertListEqual(self.g.getNeighborsOf('a'), ['a'])
+        self.assertEqual(self.g.getWeight('a', 'a'), 2)
+        self.g.removeVertex('a')
+        self.assertFalse(self.g.edges.isMember(('a', 'a')))
+
+    def testReAddEdgeUpdatesWeight(self):
+        ''' Re-adding an edge overwrites its weight without duplicating the neighbour '''
+        self.g.addEdge('a', 'b', 3)
+        self.g.addEdge('a', 'b', 5)
+        self.assertEqual(self.g.getWeight('a', 'b'), 5)
+        self.assertListEqual(self.g.getNeighborsOf('a'), ['b'])
+
+    def testRemoveEdge(self):
+        ''' Removing a->b leaves b->a in place '''
+        self.g.addEdge('a', 'b')
+        self.g.addEdge('b', 'a')
+        self.g.removeEdge('a', 'b')
+        self.assertListEqual(self.g.getNeighborsOf('a'), [])
+        self.assertListEqual(self.g.getNeighborsOf('b'), ['a'])
+        with self.assertRaises(KeyError):
+            self.g.removeEdge('a', 'b')
+        with self.assertRaises(KeyError):
+            self.g.getWeight('a', 'b')
+
+    def testFindShortestPath(self):
+        ''' Dijkstra prefers the lighter path, BFS the one with fewer hops '''
+        for v1, v2, w in [('a', 'b', 1), ('b', 'c', 1), ('c', 'd', 1), ('a', 'd', 10), ('d', 'e', 1)]:
+            self.g.addEdge(v1, v2, w)
+        self.assertListEqual(self.g.findShortestPath('a', 'e'), ['a', 'b', 'c', 'd', 'e'])
+        self.assertListEqual(self.g.findPath('a', 'e'), ['a', 'd', 'e'])
+        self.assertListEqual(self.g.findShortestPath('e', 'a'), [])
+        self.assertListEqual(self.g.findShortestPath('a', 'a'), ['a'])
+
+    def testFindPathAStar(self):
+        ''' A* with an admissible heuristic returns the same path as Dijkstra '''
+        position = {'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4}
+        for v1, v2, w in [('a', 'b', 1), ('b', 'c', 1), ('c', 'd', 1), ('a', 'd', 10), ('d', 'e', 1)]:
+            self.g.addEdge(v1, v2, w)
+        heuristic = mock.MagicMock(side_effect=lambda v, goal: abs(position[goal] - position[v]))
+        self.assertListEqual(self.g.findPathAStar('a', 'e', heuristic), ['a', 'b', 'c', 'd', 'e'])
+        heuristic.assert_any_call('a', 'e')
+
+    def testFindPathAStarInconsistentHeuristic(self):
+        ''' An admissible but inconsistent heuristic still gives the shortest path, because
+            b is reopened once it is reached more cheaply through a '''
+        g = LWWWeightedGraph()
+        for v in 'sabg':
+            g.addVertex(v)
+        for v1, v2, w in [('s', 'a', 1), ('s', 'b', 3), ('a', 'b', 1), ('b', 'g', 3)]:
+            g.addEdge(v1, v2, w)
+        heuristic = lambda v, goal: 4 if v == 'a' else 0
+        self.assertListEqual(g.findShortestPath('s', 'g'), ['s', 'a', 'b', 'g'])
+        self.assertListEqual(g.findPathAStar('s', 'g', heuristic), ['s', 'a', 'b', 'g'])
+
+    @mock.patch('{}.LWWWeightedGraph.hashObj'.format(SRC_PATH))
+    def test_computeGraph(self, mockHash):
+        ''' Only the source vertex of each edge gets an adjacency entry '''
+        mockHash.side_effect = lambda x: x
+        graphState = self.g._computeGraph([1, 2, 3], [(1, 2), (2, 3), (3, 3)])
+        self.assertDictEqual(graphState, {1: [2], 2: [3], 3: [3]})
+
+
+class LWWWeightedGraphMergeTests(TestCase):
+
+    def setUp(self):
+        self.g1, self.g2 = LWWWeightedGraph(), LWWWeightedGraph()
+        for v in range(3):
+            self.g1.addVertex(v)
+            self.g2.addVertex(v)
+
+    def testMergeWeightLastWriterWins(self):
+        ''' The most recently written weight wins, in either merge order '''
+        self.g1.addEdge(0, 1, 4)
+        self.g2.addEdge(0, 1, 7)
+        self.g1.mergeGraphs(self.g2)
+        self.g2.mergeGraphs(self.g1)
+        self.assertEqual(self.g1.getWeight(0, 1), 7)
+        self.assertEqual(self.g2.getWeight(0, 1), 7)
+
+    def testMergeRemovesDanglingEdges(self):
+        ''' Removing a vertex on one replica drops its directed edges on the other '''
+        self.g1.addEdge(0, 2, 1)
+        self.g1.addEdge(2, 1, 1)
+        self.g2.removeVertex(2)
+        self.g1.mergeGraphs(self.g2)
+        self.assertListEqual(self.g1.edges.getMembers(), [])
+        self.assertListEqual(self.g1.findShortestPath(0, 1), [])
+        self.assertNotIn(hashObj(2), self.g1.graphState)
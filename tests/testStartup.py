@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Imports that must not happen when a short-lived worker merges a delta and exits
+# logging is only imported by ChangeFeed.publish once a callback raises
+OPTIONAL_ENGINES = ['asyncio', 'sqlite3', 'numpy', 'socket', 'heapq', 'logging']
+
+# Generous ceiling so slow CI machines do not flake. A regression pulling in asyncio
+# or NumPy is caught by the sys.modules check regardless of machine speed
+STARTUP_BUDGET_SECONDS = 0.25
+
+WORKER = '''
+import json, sys, time
+start = time.perf_counter()
+import LWWElementGraph
+packageImported = time.perf_counter()
+submodules = [m for m in sys.modules if m.startswith('LWWElementGraph.')]
+from LWWElementGraph.LWWElementGraph import LWWElementGraph
+g, delta = LWWElementGraph(), LWWElementGraph()
+delta.addVertex(1)
+g.subscribe(lambda event: None)
+g.mergeGraphs(delta)
+merged = time.perf_counter()
+print(json.dumps({
+    'package': packageImported - start,
+    'merge': merged - start,
+    'submodules': submodules,
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+''' % (OPTIONAL_ENGINES,)
+
+
+class StartupBenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        ''' Measure in a fresh interpreter, the test process has already imported everything '''
+        output = subprocess.check_output([sys.executable, '-c', WORKER], cwd=SRC_DIR)
+        cls.result = json.loads(output.decode('utf-8'))
+
+    def testNoOptionalEngines(self):
+        ''' Importing, constructing and merging with a subscriber loads none of the optional engines '''
+        self.assertListEqual(self.result['loaded'], [])
+
+    def testPackageImportIsNearZero(self):
+        ''' import LWWElementGraph itself does not load any submodule '''
+        self.assertListEqual(self.result['submodules'], [])
+        self.assertLess(self.result['package'], STARTUP_BUDGET_SECONDS / 10)
+
+    def testStartupBudget(self):
+        ''' Import, construction and a first merge fit in the startup budget '''
+        self.assertLess(self.result['merge'], STARTUP_BUDGET_SECONDS)